@@ -3,6 +3,7 @@
 
 import streamlit as st
 import pandas as pd
+import numpy as np
 import time
 import random
 from datetime import datetime
@@ -16,41 +17,77 @@ DEFAULT_PREFS = {
     "eco_mode": True
 }
 
+HOME_SIZES = ("Studio", "1BHK", "2BHK", "3BHK", "Villa")
+HOME_SIZE_INDEX = {size: i for i, size in enumerate(HOME_SIZES)}
+
+# Per-device usage ranges (kWh), drawn in one batch by generate_mock_usage
+USAGE_KEYS = ("AC", "Lights", "Appliances")
+USAGE_LOWS = np.array([1.5, 0.3, 0.5])
+USAGE_HIGHS = np.array([3.0, 0.6, 1.0])
+USAGE_INDEX = pd.Index(USAGE_KEYS)
+rng = np.random.default_rng()
+
+# (label, usage key, min, max) for each usage simulator slider
+SIM_SLIDERS = (
+    ("AC Usage (kWh)", "AC", 0.5, 5.0),
+    ("Lights Usage (kWh)", "Lights", 0.1, 1.0),
+    ("Appliances Usage (kWh)", "Appliances", 0.1, 2.0),
+)
+
+# (predicate(usage, prefs, hour), message) pairs evaluated by get_ai_suggestions;
+# a message may also be a callable taking prefs when it depends on them
+SUGGESTION_RULES = (
+    # AC-related suggestions
+    (lambda u, p, h: u["AC"] > 2.5,
+     "Turn off AC in unoccupied rooms — no activity detected."),
+    (lambda u, p, h: u["AC"] > 2.5 and p["ac_temp"] < 26,
+     lambda p: f"Try increasing AC temperature to {p['ac_temp']+1}°C (saves ~0.8 kWh/hour)"),
+    # Time-based suggestions
+    (lambda u, p, h: 8 <= h <= 11 and u["Appliances"] > 0.7,
+     "Delay laundry to off-peak hours (after 8PM saves ~1.5 AED)"),
+    # Eco-mode suggestions
+    (lambda u, p, h: p.get("eco_mode") and u["Lights"] > 0.5,
+     "Switch to eco-mode lighting in common areas (saves ~0.2 kWh/hour)"),
+)
+GENERAL_SUGGESTION = "Consider smart plugs for idle electronics (potential 10% savings)"
+
 # --- Mock Data Generation ---
-def generate_mock_usage():
+def current_hour_slot():
+    """Current time truncated to the hour, used as a cache key"""
+    return datetime.now().replace(minute=0, second=0, microsecond=0)
+
+def prefs_key(prefs):
+    """Hashable snapshot of user preferences for the cached helpers"""
+    return tuple(sorted(prefs.items()))
+
+@st.cache_data(max_entries=2)
+def generate_mock_usage(hour_slot):
     """Generate realistic mock energy usage data"""
-    current_hour = datetime.now().hour
+    current_hour = hour_slot.hour
     night_multiplier = 0.7 if 22 <= current_hour <= 6 else 1.0
+    evening_multiplier = 1.5 if 18 <= current_hour <= 22 else 1.0
     
-    return {
-        "AC": round(random.uniform(1.5, 3.0) * night_multiplier, 2),
-        "Lights": round(random.uniform(0.3, 0.6) * night_multiplier, 2),
-        "Appliances": round(random.uniform(0.5, 1.0) * (1.5 if 18 <= current_hour <= 22 else 1.0), 2)
-    }
+    multipliers = np.array([night_multiplier, night_multiplier, evening_multiplier])
+    values = rng.uniform(USAGE_LOWS, USAGE_HIGHS) * multipliers
+    return dict(zip(USAGE_KEYS, np.round(values, 2).tolist()))
+
+def usage_series(usage):
+    """Wrap a usage dict as a kWh Series for charting"""
+    return pd.Series([usage[key] for key in USAGE_KEYS], index=USAGE_INDEX, name="kWh", dtype=float)
 
-def get_ai_suggestions(usage, prefs):
+@st.cache_data(max_entries=128)
+def get_ai_suggestions(usage, prefs, current_hour):
     """Generate intelligent suggestions based on usage patterns"""
-    suggestions = []
-    current_hour = datetime.now().hour
-    
-    # AC-related suggestions
-    if usage["AC"] > 2.5:
-        suggestions.append("Turn off AC in unoccupied rooms — no activity detected.")
-        if prefs["ac_temp"] < 26:
-            suggestions.append(f"Try increasing AC temperature to {prefs['ac_temp']+1}°C (saves ~0.8 kWh/hour)")
-    
-    # Time-based suggestions
-    if 8 <= current_hour <= 11 and usage["Appliances"] > 0.7:
-        suggestions.append("Delay laundry to off-peak hours (after 8PM saves ~1.5 AED)")
-    
-    # Eco-mode suggestions
-    if prefs.get("eco_mode"):
-        if usage["Lights"] > 0.5:
-            suggestions.append("Switch to eco-mode lighting in common areas (saves ~0.2 kWh/hour)")
+    prefs = dict(prefs)
+    suggestions = [
+        message(prefs) if callable(message) else message
+        for applies, message in SUGGESTION_RULES
+        if applies(usage, prefs, current_hour)
+    ]
     
     # General suggestions
     if len(suggestions) < 2:
-        suggestions.append("Consider smart plugs for idle electronics (potential 10% savings)")
+        suggestions.append(GENERAL_SUGGESTION)
     
     return suggestions
 
@@ -70,8 +107,8 @@ def show_onboarding():
         name = st.text_input("Your Name", value=st.session_state.user_prefs["name"])
         home_size = st.selectbox(
             "Home Size", 
-            ["Studio", "1BHK", "2BHK", "3BHK", "Villa"],
-            index=["Studio", "1BHK", "2BHK", "3BHK", "Villa"].index(st.session_state.user_prefs["home_size"])
+            HOME_SIZES,
+            index=HOME_SIZE_INDEX[st.session_state.user_prefs["home_size"]]
         )
         working_hours = st.slider(
             "Your Daily Working Hours", 
@@ -117,20 +154,23 @@ def show_dashboard():
     
     # Real-Time Usage Section
     st.header("🔌 Current Energy Usage")
-    usage = generate_mock_usage()
-    total_usage = sum(usage.values())
+    hour_slot = current_hour_slot()
+    usage = generate_mock_usage(hour_slot)
+    total_usage = usage["AC"] + usage["Lights"] + usage["Appliances"]
+    cost = total_usage * 0.5
+    co2 = total_usage * 0.42
     
     col1, col2 = st.columns(2)
     with col1:
         st.metric("Total Consumption", f"{total_usage} kWh")
     with col2:
-        st.metric("Estimated Cost", f"{total_usage * 0.5:.2f} AED")
+        st.metric("Estimated Cost", f"{cost:.2f} AED")
     
-    st.bar_chart(pd.DataFrame.from_dict(usage, orient='index', columns=['kWh']))
+    st.bar_chart(usage_series(usage))
     
     # AI Suggestions Section
     st.header("🧠 Smart Recommendations")
-    suggestions = get_ai_suggestions(usage, st.session_state.user_prefs)
+    suggestions = get_ai_suggestions(usage, prefs_key(st.session_state.user_prefs), hour_slot.hour)
     
     if not suggestions:
         st.info("No specific recommendations right now. Your usage looks efficient!")
@@ -141,23 +181,33 @@ def show_dashboard():
     # Impact Metrics
     st.header("🌍 Your Sustainability Impact")
     savings = round(total_usage * random.uniform(0.5, 1.5), 2)
-    carbon_saved = round(total_usage * 0.42, 2)
-    
-    cols = st.columns(3)
-    cols[0].metric("💰 Savings", f"{savings} AED")
-    cols[1].metric("🌱 CO₂ Saved", f"{carbon_saved} kg")
-    cols[2].metric("💧 Water Saved", f"{carbon_saved * 10} liters")
+    carbon_saved = round(co2, 2)
+    water_saved = round(co2 * 10, 2)
+    
+    # Single markdown block instead of three separate metric widgets
+    st.markdown(
+        "<div style='display:flex;gap:2em'>"
+        f"<div>💰 Savings<br><b>{savings} AED</b></div>"
+        f"<div>🌱 CO₂ Saved<br><b>{carbon_saved} kg</b></div>"
+        f"<div>💧 Water Saved<br><b>{water_saved} liters</b></div>"
+        "</div>",
+        unsafe_allow_html=True
+    )
     
     # Simulation Tool
     st.header("🧪 Usage Simulator")
     with st.expander("Try different scenarios"):
-        sim_ac = st.slider("AC Usage (kWh)", 0.5, 5.0, usage["AC"])
-        sim_lights = st.slider("Lights Usage (kWh)", 0.1, 1.0, usage["Lights"])
-        sim_appliances = st.slider("Appliances Usage (kWh)", 0.1, 2.0, usage["Appliances"])
+        # Sliders live in a form so dragging them doesn't rerun the dashboard
+        with st.form("simulator_form"):
+            sim_usage = {
+                key: st.slider(label, low, high, usage[key])
+                for label, key, low, high in SIM_SLIDERS
+            }
+            
+            calculate = st.form_submit_button("Calculate Savings")
         
-        if st.button("Calculate Savings"):
-            sim_usage = {"AC": sim_ac, "Lights": sim_lights, "Appliances": sim_appliances}
-            sim_suggestions = get_ai_suggestions(sim_usage, st.session_state.user_prefs)
+        if calculate:
+            sim_suggestions = get_ai_suggestions(sim_usage, prefs_key(st.session_state.user_prefs), hour_slot.hour)
             
             st.write("**Potential Savings:**")
             for s in sim_suggestions:
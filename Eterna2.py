@@ -7,36 +7,81 @@ import numpy as np
 from datetime import datetime, timedelta
 import plotly.express as px
 import time
-import pytz
+from zoneinfo import ZoneInfo
 import random
 from sklearn.linear_model import LinearRegression
+
+USAGE_KEYS = ("AC", "Lights", "Appliances")
+USAGE_LOWS = np.array([1.5, 0.3, 0.5])
+USAGE_HIGHS = np.array([3.0, 0.6, 1.0])
+USAGE_INDEX = pd.Index(USAGE_KEYS)
+rng = np.random.default_rng()
+USAGE_HISTORY_SLOTS = 168  # one week of hourly readings
+SIM_SLIDERS = (
+    ("AC Usage (kWh)", "AC", 0.5, 5.0),
+    ("Lights Usage (kWh)", "Lights", 0.1, 1.0),
+    ("Appliances Usage (kWh)", "Appliances", 0.1, 2.0),
+)
+DUBAI_TZ = ZoneInfo("Asia/Dubai")
+
+TRANSLATIONS = {
+    "Turn off AC in Room 2 — no activity detected.": "أطفئ التكييف في الغرفة 2 — لا يوجد نشاط.",
+    "Fan + 1° higher AC temp = same comfort, lower cost.": "استخدم المروحة وارفع حرارة التكييف بدرجة واحدة — نفس الراحة وتكلفة أقل.",
+    "Delay laundry to off-peak hours (saves 1.5 AED).": "أجل الغسيل إلى ساعات خارج الذروة لتوفير 1.5 درهم.",
+    "Switch to eco-mode lighting in hallways.": "فعّل وضع الإضاءة الاقتصادية في الممرات."
+}
+
+# (predicate(usage, prefs, hour), message) pairs used by get_ai_suggestions
+SUGGESTION_RULES = (
+    (lambda u, p, h: u["AC"] > 2.5, "Turn off AC in Room 2 — no activity detected."),
+    (lambda u, p, h: u["AC"] > 2.5, "Fan + 1° higher AC temp = same comfort, lower cost."),
+    (lambda u, p, h: h < 12, "Delay laundry to off-peak hours (saves 1.5 AED)."),
+    (lambda u, p, h: p.get("eco_mode"), "Switch to eco-mode lighting in hallways."),
+)
+
+# EnergyAI messages; PEAK_MSG is a bound str.format taking the AED savings
+PEAK_MSG = "🚨 Peak hours! Delay appliances to save {} AED".format
+HIGH_AC_MSG = "🌡️ AC Usage Pattern Detected: Consider smart thermostat"
+OPTIMAL_MSG = "🌟 Your usage looks optimal!"
+
 # --- Session State Setup ---
 if "registered" not in st.session_state:
     st.session_state.registered = False
 if "user_prefs" not in st.session_state:
     st.session_state.user_prefs = {}
 if "usage_history" not in st.session_state:
-    st.session_state.usage_history = []
+    st.session_state.usage_history = np.zeros(USAGE_HISTORY_SLOTS, dtype=np.float32)
+    st.session_state.uh_idx = 0
 
 # --- Helper Functions ---
 
-def generate_mock_usage():
-    return {
-        "AC": round(random.uniform(1.5, 3.0), 2),
-        "Lights": round(random.uniform(0.3, 0.6), 2),
-        "Appliances": round(random.uniform(0.5, 1.0), 2)
-    }
-
-def get_ai_suggestions(usage, prefs):
-    suggestions = []
-    if usage["AC"] > 2.5:
-        suggestions.append("Turn off AC in Room 2 — no activity detected.")
-        suggestions.append("Fan + 1° higher AC temp = same comfort, lower cost.")
-    if datetime.now().hour < 12:
-        suggestions.append("Delay laundry to off-peak hours (saves 1.5 AED).")
-    if prefs.get("eco_mode"):
-        suggestions.append("Switch to eco-mode lighting in hallways.")
-    return suggestions
+def current_hour_slot():
+    return datetime.now().replace(minute=0, second=0, microsecond=0)
+
+def prefs_key(prefs):
+    return tuple(sorted(prefs.items()))
+
+@st.cache_data(max_entries=2)
+def generate_mock_usage(hour_slot):
+    return dict(zip(USAGE_KEYS, np.round(rng.uniform(USAGE_LOWS, USAGE_HIGHS), 2).tolist()))
+
+def record_usage(total):
+    """Write a reading into the fixed-size usage ring buffer"""
+    st.session_state.usage_history[st.session_state.uh_idx % USAGE_HISTORY_SLOTS] = total
+    st.session_state.uh_idx += 1
+
+def recent_usage_history():
+    """Buffered readings in chronological order, oldest first"""
+    idx = st.session_state.uh_idx
+    return np.roll(st.session_state.usage_history, -idx)[USAGE_HISTORY_SLOTS - min(idx, USAGE_HISTORY_SLOTS):]
+
+def usage_series(usage):
+    return pd.Series([usage[key] for key in USAGE_KEYS], index=USAGE_INDEX, name="kWh", dtype=float)
+
+@st.cache_data(max_entries=128)
+def get_ai_suggestions(usage, prefs, current_hour):
+    prefs = dict(prefs)
+    return [message for applies, message in SUGGESTION_RULES if applies(usage, prefs, current_hour)]
 
 
 # ========================
@@ -44,66 +89,71 @@ def get_ai_suggestions(usage, prefs):
 # ========================
 class EnergyAI:
     def __init__(self):
-        self.learned_habits = {}
         self.peak_hours = (18, 22)
         self.energy_rates = {
             'peak': 0.65,    # AED/kWh
             'off_peak': 0.30 # AED/kWh
         }
         
-    def detect_usage_patterns(self, history):
+    def detect_usage_patterns(self, history, learned_habits):
         """AI that learns user habits from historical data"""
-        if len(history) > 3:
-            avg_ac = np.mean([x['AC'] for x in history[-3:]])
-            if avg_ac > 2.8 and 'high_ac' not in self.learned_habits:
-                self.learned_habits['high_ac'] = True
+        ac = history['AC'].to_numpy()
+        if len(ac) > 3:
+            avg_ac = ac[-3:].mean()
+            if avg_ac > 2.8 and 'high_ac' not in learned_habits:
+                learned_habits['high_ac'] = True
                 
-    def get_smart_suggestions(self, current_usage, user_prefs):
+    def get_smart_suggestions(self, current_usage, user_prefs, learned_habits):
         """Generates hyper-personalized recommendations"""
-        now = datetime.now(pytz.timezone('Asia/Dubai'))
+        now = datetime.now(DUBAI_TZ)
         suggestions = []
         
         # Time-based intelligence
         if now.hour in self.peak_hours and current_usage['Appliances'] > 0.7:
             savings = round((current_usage['Appliances'] * (self.energy_rates['peak'] - self.energy_rates['off_peak'])), 2)
-            suggestions.append(f"🚨 Peak hours! Delay appliances to save {savings} AED")
+            suggestions.append(PEAK_MSG(savings))
         
         # Learned habit adjustments
-        if self.learned_habits.get('high_ac'):
-            suggestions.append("🌡️ AC Usage Pattern Detected: Consider smart thermostat")
+        if learned_habits.get('high_ac'):
+            suggestions.append(HIGH_AC_MSG)
         
-        return suggestions or ["🌟 Your usage looks optimal!"]
+        return suggestions or [OPTIMAL_MSG]
+
+@st.cache_resource
+def get_ai():
+    """Single EnergyAI instance shared across sessions"""
+    return EnergyAI()
 
 # ========================
 # 📊 DATA ENGINE
 # ========================
-def generate_usage_history(days=7):
-    """Generates realistic historical data"""
-    history = []
-    now = datetime.now()
+@st.cache_data(max_entries=2)
+def generate_usage_history(today, days=7):
+    """Generates realistic historical data (cached per calendar day)"""
+    n = (days + 1) * 24
+    hours = np.tile(np.arange(24), days + 1)
     
-    for day in range(days, -1, -1):
-        date = now - timedelta(days=day)
-        for hour in range(24):
-            # Daily patterns
-            if 6 <= hour <= 8:  # Morning
-                ac = random.uniform(1.8, 2.5)
-                lights = random.uniform(0.4, 0.7)
-            elif 18 <= hour <= 22:  # Evening
-                ac = random.uniform(2.5, 3.2)
-                lights = random.uniform(0.6, 0.9)
-            else:  # Night
-                ac = random.uniform(0.8, 1.5) * 0.6
-                lights = random.uniform(0.1, 0.3)
-            
-            history.append({
-                'timestamp': date.replace(hour=hour, minute=0),
-                'AC': round(ac, 2),
-                'Lights': round(lights, 2),
-                'Appliances': round(random.uniform(0.5, 1.2), 2)
-            })
+    # Daily patterns
+    morning = (hours >= 6) & (hours <= 8)
+    evening = (hours >= 18) & (hours <= 22)
+    ac = np.select(
+        [morning, evening],
+        [rng.uniform(1.8, 2.5, n), rng.uniform(2.5, 3.2, n)],
+        rng.uniform(0.8, 1.5, n) * 0.6  # Night
+    )
+    lights = np.select(
+        [morning, evening],
+        [rng.uniform(0.4, 0.7, n), rng.uniform(0.6, 0.9, n)],
+        rng.uniform(0.1, 0.3, n)
+    )
     
-    return history
+    start = datetime.combine(today - timedelta(days=days), datetime.min.time())
+    return pd.DataFrame({
+        'timestamp': pd.date_range(start, periods=n, freq=pd.Timedelta(hours=1)),
+        'AC': ac.round(2),
+        'Lights': lights.round(2),
+        'Appliances': rng.uniform(0.5, 1.2, n).round(2)
+    })
 
 # ========================
 # 🎨 UI COMPONENTS
@@ -123,6 +173,11 @@ def create_gauge(value, title):
     )
     return fig
 
+@st.cache_data(max_entries=4)
+def create_trend_chart(history):
+    """Line chart spec of per-device usage, cached as a plain dict (cheap to unpickle)"""
+    return px.line(history, x='timestamp', y=['AC', 'Lights', 'Appliances']).to_dict()
+
 # ========================
 # 🚀 APP CORE
 # ========================
@@ -134,9 +189,10 @@ def main():
         layout="wide"
     )
     
-    if 'ai' not in st.session_state:
-        st.session_state.ai = EnergyAI()
-        st.session_state.history = generate_usage_history()
+    ai = get_ai()
+    if 'history' not in st.session_state:
+        st.session_state.learned_habits = {}
+        st.session_state.history = generate_usage_history(datetime.now().date())
         st.session_state.prefs = {
             'name': 'User',
             'comfort': 'Balanced',
@@ -154,18 +210,20 @@ def main():
     st.title(f"🌿 Eterna 2.0 • Welcome, {st.session_state.prefs['name']}!")
     
     # Current Usage
-    current = st.session_state.history[-1]
-    total = sum([current['AC'], current['Lights'], current['Appliances']])
+    recent = st.session_state.history.tail(24)
+    current = recent.iloc[-1]
+    total = current['AC'] + current['Lights'] + current['Appliances']
+    co2 = total * 0.42
     
     cols = st.columns(4)
     cols[0].metric("Usage", f"{total} kWh")
     cols[1].metric("Cost", f"{total*0.5:.2f} AED")
-    cols[2].metric("CO₂ Saved", f"{total*0.42:.2f} kg")
-    cols[3].metric("Water Saved", f"{total*4.2:.2f} L")
+    cols[2].metric("CO₂ Saved", f"{co2:.2f} kg")
+    cols[3].metric("Water Saved", f"{co2*10:.2f} L")
     
     # AI Recommendations
-    st.session_state.ai.detect_usage_patterns(st.session_state.history)
-    suggestions = st.session_state.ai.get_smart_suggestions(current, st.session_state.prefs)
+    ai.detect_usage_patterns(st.session_state.history, st.session_state.learned_habits)
+    suggestions = ai.get_smart_suggestions(current, st.session_state.prefs, st.session_state.learned_habits)
     
     with st.expander("💡 AI Recommendations", expanded=True):
         for s in suggestions:
@@ -175,16 +233,24 @@ def main():
     tab1, tab2 = st.tabs(["📈 Trends", "🎛️ Simulator"])
     
     with tab1:
-        df = pd.DataFrame(st.session_state.history[-24:])
-        st.plotly_chart(px.line(df, x='timestamp', y=['AC', 'Lights', 'Appliances']), use_container_width=True)
+        st.plotly_chart(create_trend_chart(recent), use_container_width=True)
     
     with tab2:
         st.write("Test different scenarios:")
         ac = st.slider("AC Usage", 0.5, 5.0, current['AC'])
         if st.button("Simulate"):
-            sim_usage = {'AC': ac, 'Lights': current['Lights'], 'Appliances': current['Appliances']}
-            sim_suggestions = st.session_state.ai.get_smart_suggestions(sim_usage, st.session_state.prefs)
-            for s in sim_suggestions:
+            # Reuse the last result while the scenario and its inputs are unchanged
+            sim_key = (
+                ac, current['Lights'], current['Appliances'],
+                datetime.now(DUBAI_TZ).hour,
+                prefs_key(st.session_state.prefs),
+                prefs_key(st.session_state.learned_habits)
+            )
+            if st.session_state.get('sim_key') != sim_key:
+                sim_usage = {'AC': ac, 'Lights': current['Lights'], 'Appliances': current['Appliances']}
+                st.session_state.sim_key = sim_key
+                st.session_state.sim_result = ai.get_smart_suggestions(sim_usage, st.session_state.prefs, st.session_state.learned_habits)
+            for s in st.session_state.sim_result:
                 st.info(f"🔮 {s}")
 
 if __name__ == "__main__":
@@ -197,13 +263,14 @@ else:
     st.write("Welcome back!")
 
 st.header("🔌 Real-Time Energy Usage")
-usage = generate_mock_usage()
-total_usage = sum(usage.values())
+hour_slot = current_hour_slot()
+usage = generate_mock_usage(hour_slot)
+total_usage = usage["AC"] + usage["Lights"] + usage["Appliances"]
 
-st.session_state.usage_history.append(total_usage)
+record_usage(total_usage)
 
 st.metric("Total Energy Used (kWh)", total_usage)
-st.bar_chart(pd.DataFrame(usage.values(), index=usage.keys(), columns=["kWh"]))
+st.bar_chart(usage_series(usage))
 from sklearn.linear_model import LinearRegression
 import numpy as np
 
@@ -217,24 +284,17 @@ def train_and_predict_energy(usage_history):
     return round(prediction, 2)
 
 # --- Azure ML Simulated Prediction ---
-if len(st.session_state.usage_history) > 2:
-    predicted = train_and_predict_energy(st.session_state.usage_history)
+if st.session_state.uh_idx > 2:
+    predicted = train_and_predict_energy(recent_usage_history())
     st.info(f"🔮 Predicted Tomorrow's Energy Usage (via Azure ML): **{predicted} kWh**")
 
 # --- 3. Smart Advisor ---
 st.header("🧠 Smart Suggestions")
-suggestions = get_ai_suggestions(usage, st.session_state.user_prefs)
+suggestions = get_ai_suggestions(usage, prefs_key(st.session_state.user_prefs), hour_slot.hour)
 arabic_mode = st.checkbox("🔁 Show Arabic Suggestions")
 
-translations = {
-    "Turn off AC in Room 2 — no activity detected.": "أطفئ التكييف في الغرفة 2 — لا يوجد نشاط.",
-    "Fan + 1° higher AC temp = same comfort, lower cost.": "استخدم المروحة وارفع حرارة التكييف بدرجة واحدة — نفس الراحة وتكلفة أقل.",
-    "Delay laundry to off-peak hours (saves 1.5 AED).": "أجل الغسيل إلى ساعات خارج الذروة لتوفير 1.5 درهم.",
-    "Switch to eco-mode lighting in hallways.": "فعّل وضع الإضاءة الاقتصادية في الممرات."
-}
-
 for s in suggestions:
-    st.success("💡 " + (translations[s] if arabic_mode and s in translations else s))
+    st.success("💡 " + (TRANSLATIONS.get(s, s) if arabic_mode else s))
 
 # --- 4. Impact & Rewards ---
 st.header("🌍 Impact & Rewards")
@@ -252,15 +312,15 @@ st.caption("Reach 10 AED to earn your next 🌟")
 
 # --- 5. Simulation Mode ---
 st.header("🧪 Simulation Mode")
-sim_ac = st.slider("AC Usage (kWh)", 0.5, 5.0, usage["AC"])
-sim_lights = st.slider("Lights Usage (kWh)", 0.1, 1.0, usage["Lights"])
-sim_appliances = st.slider("Appliances Usage (kWh)", 0.1, 2.0, usage["Appliances"])
+with st.form("simulation_form"):
+    sim_usage = {key: st.slider(label, low, high, usage[key]) for label, key, low, high in SIM_SLIDERS}
+    st.form_submit_button("Calculate")
 
-sim_total = sim_ac + sim_lights + sim_appliances
+sim_total = sim_usage["AC"] + sim_usage["Lights"] + sim_usage["Appliances"]
 st.write(f"Total Simulated Usage: **{sim_total} kWh**")
 st.write("AI would recommend:")
-sim_suggestions = get_ai_suggestions({"AC": sim_ac, "Lights": sim_lights, "Appliances": sim_appliances}, st.session_state.user_prefs)
+sim_suggestions = get_ai_suggestions(sim_usage, prefs_key(st.session_state.user_prefs), hour_slot.hour)
 for s in sim_suggestions:
-    st.info("🤖 " + (translations[s] if arabic_mode and s in translations else s))
+    st.info("🤖 " + (TRANSLATIONS.get(s, s) if arabic_mode else s))
 
 st.caption("🔁 Powered by Eterna AI — Predict. Advise. Save.")